@@ -22,7 +22,11 @@ from scrapy.linkextractors import IGNORED_EXTENSIONS, _is_valid_url, _matches
 from scrapy.utils.misc import arg_to_iter, rel_has_nofollow
 from scrapy.utils.python import unique as unique_list
 from scrapy.utils.response import get_base_url
-from scrapy.utils.url import url_has_any_extension, url_is_from_any_domain
+from scrapy.utils.url import (
+    _CompiledExtensions,
+    _url_has_compiled_extension,
+    url_is_from_any_domain,
+)
 
 if TYPE_CHECKING:
     from lxml.html import HtmlElement
@@ -343,6 +347,8 @@ class LxmlLinkExtractor:
             deny_extensions = IGNORED_EXTENSIONS
         self.canonicalize: bool = canonicalize
         self.deny_extensions: set[str] = {"." + e for e in arg_to_iter(deny_extensions)}
+        self._deny_extensions_source: frozenset[str] | None = None
+        self._deny_extensions: _CompiledExtensions | None = None
         self.restrict_text: list[re.Pattern[str]] = self._compile_regexes(restrict_text)
 
     @staticmethod
@@ -352,6 +358,15 @@ class LxmlLinkExtractor:
             for x in arg_to_iter(value)
         ]
 
+    def _compiled_deny_extensions(self) -> _CompiledExtensions:
+        # deny_extensions is public and may be changed after __init__().
+        if self._deny_extensions is None or (
+            self.deny_extensions != self._deny_extensions_source
+        ):
+            self._deny_extensions_source = frozenset(self.deny_extensions)
+            self._deny_extensions = _CompiledExtensions(self._deny_extensions_source)
+        return self._deny_extensions
+
     def _link_allowed(self, link: Link) -> bool:
         if not _is_valid_url(link.url):
             return False
@@ -366,8 +381,8 @@ class LxmlLinkExtractor:
             return False
         if self.deny_domains and url_is_from_any_domain(parsed_url, self.deny_domains):
             return False
-        if self.deny_extensions and url_has_any_extension(
-            parsed_url, self.deny_extensions
+        if self.deny_extensions and _url_has_compiled_extension(
+            parsed_url, self._compiled_deny_extensions()
         ):
             return False
         return not self.restrict_text or _matches(link.text, self.restrict_text)
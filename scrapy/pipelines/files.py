@@ -83,6 +83,16 @@ def _md5sum(file: IO[bytes]) -> str:
     return m.hexdigest()
 
 
+def _hash_url(url: bytes) -> str:
+    """Return the hexadecimal SHA-1 digest of *url*, used to build file paths.
+
+    :mod:`hashlib` relies on OpenSSL, which uses hardware-accelerated SHA-1
+    (e.g. Intel SHA extensions) where available. The digest is not used for
+    security purposes, so FIPS-restricted builds can compute it as well.
+    """
+    return hashlib.sha1(url, usedforsecurity=False).hexdigest()
+
+
 class StatInfo(TypedDict, total=False):
     checksum: str
     last_modified: float
@@ -752,7 +762,7 @@ class FilesPipeline(MediaPipeline):
         *,
         item: Any = None,
     ) -> str:
-        media_guid = hashlib.sha1(to_bytes(request.url)).hexdigest()  # noqa: S324
+        media_guid = _hash_url(to_bytes(request.url))
 
         # clean it up and look at the path first
         parsed_url = urlparse_cached(request)
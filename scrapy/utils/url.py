@@ -5,12 +5,15 @@ library.
 
 from __future__ import annotations
 
+import functools
 import re
 from typing import TYPE_CHECKING, TypeAlias
-from urllib.parse import ParseResult, urlparse, urlunparse
+from urllib.parse import ParseResult, urlsplit, urlunsplit
 
 from w3lib.url import any_to_uri, parse_url
 
+from scrapy.utils.python import to_unicode
+
 if TYPE_CHECKING:
     from collections.abc import Iterable
 
@@ -19,12 +22,57 @@ if TYPE_CHECKING:
 UrlT: TypeAlias = str | bytes | ParseResult
 
 
-def url_is_from_any_domain(url: UrlT, domains: Iterable[str]) -> bool:
-    """Return True if the url belongs to any of the given domains"""
-    host = parse_url(url).netloc.lower()
+def _compile_domains(domains: Iterable[str]) -> frozenset[str]:
+    """Return *domains* in the form expected by :func:`_host_is_from_any_domain`."""
+    return frozenset(map(str.lower, domains))
+
+
+def _host_is_from_any_domain(host: str, domains: frozenset[str]) -> bool:
+    """Return True if *host* is one of *domains* or a subdomain of one of them.
+
+    *host* and *domains* must be lowercase. Instead of comparing *host* with
+    every domain, each of its dot-separated suffixes is looked up in
+    *domains*, so that the cost depends on the number of labels of *host*
+    rather than on the number of domains.
+    """
+    if host in domains:
+        return True
+    dot = host.find(".")
+    while dot != -1:
+        if host[dot + 1 :] in domains:
+            return True
+        dot = host.find(".", dot + 1)
+    return False
+
+
+def _url_host(url: UrlT) -> str:
+    parts = url if isinstance(url, ParseResult) else urlsplit(to_unicode(url))
+    return parts.netloc.lower()
+
+
+def _url_is_from_compiled_domains(url: UrlT, domains: frozenset[str]) -> bool:
+    host = _url_host(url)
     if not host:
         return False
-    return any((host == d) or (host.endswith(f".{d}")) for d in map(str.lower, domains))
+    return _host_is_from_any_domain(host, domains)
+
+
+def url_is_from_any_domain(url: UrlT, domains: Iterable[str]) -> bool:
+    """Return True if the url belongs to any of the given domains"""
+    return _url_is_from_compiled_domains(url, _compile_domains(domains))
+
+
+def url_is_from_any_domain_many(
+    urls: Iterable[UrlT], domains: Iterable[str]
+) -> list[bool]:
+    """Return, for each of the urls, whether it belongs to any of the given
+    domains.
+
+    This is equivalent to calling :func:`url_is_from_any_domain` for each url,
+    but *domains* are only processed once.
+    """
+    compiled_domains = _compile_domains(domains)
+    return [_url_is_from_compiled_domains(url, compiled_domains) for url in urls]
 
 
 def _spider_domains(spider: type[Spider]) -> Iterable[str]:
@@ -38,59 +86,117 @@ def url_is_from_spider(url: UrlT, spider: type[Spider]) -> bool:
     return url_is_from_any_domain(url, _spider_domains(spider))
 
 
+class _CompiledExtensions:
+    """Extensions prepared for repeated :func:`_url_has_compiled_extension` calls.
+
+    Extensions starting with a dot (the usual case) are stored in a set, so
+    that a path is matched by looking up its suffixes starting at a dot,
+    instead of comparing the path with every extension.
+    """
+
+    __slots__ = ("_dotted", "_max_length", "_other")
+
+    def __init__(self, extensions: Iterable[str]):
+        extensions = set(extensions)
+        self._dotted: frozenset[str] = frozenset(
+            ext for ext in extensions if ext.startswith(".")
+        )
+        self._other: tuple[str, ...] = tuple(extensions - self._dotted)
+        self._max_length: int = max(map(len, self._dotted), default=0)
+
+    def matches(self, path: str) -> bool:
+        if self._other and path.endswith(self._other):
+            return True
+        start = max(len(path) - self._max_length, 0)
+        dot = path.rfind(".", start)
+        while dot != -1:
+            if path[dot:] in self._dotted:
+                return True
+            dot = path.rfind(".", start, dot)
+        return False
+
+
 def url_has_any_extension(url: UrlT, extensions: Iterable[str]) -> bool:
     """Return True if the url ends with one of the extensions provided"""
     lowercase_path = parse_url(url).path.lower()
     return any(lowercase_path.endswith(ext) for ext in extensions)
 
 
+def _url_has_compiled_extension(url: UrlT, extensions: _CompiledExtensions) -> bool:
+    """Same as :func:`url_has_any_extension`, for extensions compiled in
+    advance."""
+    return extensions.matches(parse_url(url).path.lower())
+
+
+def url_has_any_extension_many(
+    urls: Iterable[UrlT], extensions: Iterable[str]
+) -> list[bool]:
+    """Return, for each of the urls, whether it ends with one of the
+    extensions provided.
+
+    This is equivalent to calling :func:`url_has_any_extension` for each url,
+    but *extensions* are only processed once.
+    """
+    matches = _CompiledExtensions(extensions).matches
+    return [matches(parse_url(url).path.lower()) for url in urls]
+
+
+_COMMON_SCHEME_PREFIXES = ("http://", "https://", "ftp://")
+_SCHEME_PREFIX_RE = re.compile(r"^\w+://", flags=re.IGNORECASE)
+
+
 def add_http_if_no_scheme(url: str) -> str:
-    """Add http as the default scheme if it is missing from the url."""
-    match = re.match(r"^\w+://", url, flags=re.IGNORECASE)
-    if not match:
-        parts = urlparse(url)
-        scheme = "http:" if parts.netloc else "http://"
-        url = scheme + url
+    """Add http as the default scheme if it is missing from the url.
 
-    return url
+    Results are cached, as the same URLs (e.g. proxy URLs) are usually
+    processed many times.
+    """
+    return _add_http_if_no_scheme(url)
 
 
-def _is_posix_path(string: str) -> bool:
-    return bool(
-        re.match(
-            r"""
-            ^                   # start with...
-            (
-                \.              # ...a single dot,
-                (
-                    \. | [^/\.]+  # optionally followed by
-                )?                # either a second dot or some characters
-                |
-                ~   # $HOME
-            )?      # optional match of ".", ".." or ".blabla"
-            /       # at least one "/" for a file path,
-            .       # and something after the "/"
-            """,
-            string,
-            flags=re.VERBOSE,
-        )
+@functools.lru_cache(maxsize=1024)
+def _add_http_if_no_scheme(url: str) -> str:
+    if url.startswith(_COMMON_SCHEME_PREFIXES) or _SCHEME_PREFIX_RE.match(url):
+        return url
+    if urlsplit(url).netloc:
+        return f"http:{url}"
+    return f"http://{url}"
+
+
+_POSIX_PATH_RE = re.compile(
+    r"""
+    ^                   # start with...
+    (
+        \.              # ...a single dot,
+        (
+            \. | [^/\.]+  # optionally followed by
+        )?                # either a second dot or some characters
+        |
+        ~   # $HOME
+    )?      # optional match of ".", ".." or ".blabla"
+    /       # at least one "/" for a file path,
+    .       # and something after the "/"
+    """,
+    flags=re.VERBOSE,
+)
+_WINDOWS_PATH_RE = re.compile(
+    r"""
+    ^
+    (
+        [a-z]:\\
+        | \\\\
     )
+    """,
+    flags=re.IGNORECASE | re.VERBOSE,
+)
+
+
+def _is_posix_path(string: str) -> bool:
+    return _POSIX_PATH_RE.match(string) is not None
 
 
 def _is_windows_path(string: str) -> bool:
-    return bool(
-        re.match(
-            r"""
-            ^
-            (
-                [a-z]:\\
-                | \\\\
-            )
-            """,
-            string,
-            flags=re.IGNORECASE | re.VERBOSE,
-        )
-    )
+    return _WINDOWS_PATH_RE.match(string) is not None
 
 
 def _is_filesystem_path(string: str) -> bool:
@@ -99,12 +205,21 @@ def _is_filesystem_path(string: str) -> bool:
 
 def guess_scheme(url: str) -> str:
     """Add an URL scheme if missing: file:// for filepath-like input or
-    http:// otherwise."""
+    http:// otherwise.
+
+    Only the http:// case is cached (see :func:`add_http_if_no_scheme`), as
+    relative filesystem paths are resolved against the current directory.
+    """
+    if url.startswith(_COMMON_SCHEME_PREFIXES):
+        return url
     if _is_filesystem_path(url):
         return any_to_uri(url)
     return add_http_if_no_scheme(url)
 
 
+_DEFAULT_PORTS: dict[str, int] = {"http": 80, "https": 443, "ftp": 21}
+
+
 def strip_url(
     url: str,
     strip_credentials: bool = True,
@@ -120,35 +235,53 @@ def strip_url(
     - ``origin_only`` replaces the  path component with "/", also dropping
       the query component; it also strips credentials
     - ``strip_fragment`` drops any #fragment component
+
+    Results are cached, as the same URLs are usually stripped many times
+    (e.g. when setting the ``Referer`` header of every request to a page).
     """
+    return _strip_url(
+        url, strip_credentials, strip_default_port, origin_only, strip_fragment
+    )
+
 
-    parsed_url = urlparse(url)
+@functools.lru_cache(maxsize=4096)
+def _strip_url(
+    url: str,
+    strip_credentials: bool,
+    strip_default_port: bool,
+    origin_only: bool,
+    strip_fragment: bool,
+) -> str:
+    parsed_url = urlsplit(url)
     netloc = parsed_url.netloc
     if (strip_credentials or origin_only) and (
         parsed_url.username or parsed_url.password
     ):
         netloc = netloc.split("@")[-1]
 
-    if (
-        strip_default_port
-        and parsed_url.port
-        and (parsed_url.scheme, parsed_url.port)
-        in {
-            ("http", 80),
-            ("https", 443),
-            ("ftp", 21),
-        }
-    ):
-        port_suffix = f":{parsed_url.port}"
-        netloc = netloc.removesuffix(port_suffix)
+    if strip_default_port:
+        host_port = netloc.rpartition("@")[2].rpartition("]")[2]
+        if ":" in host_port:
+            port = host_port.partition(":")[2]
+            default_port = _DEFAULT_PORTS.get(parsed_url.scheme)
+            if default_port is not None and port == str(default_port):
+                netloc = netloc[: -len(port) - 1]
+            else:
+                # raises ValueError for invalid ports
+                _ = parsed_url.port
 
-    return urlunparse(
-        (
-            parsed_url.scheme,
-            netloc,
-            "/" if origin_only else parsed_url.path,
-            "" if origin_only else parsed_url.params,
-            "" if origin_only else parsed_url.query,
-            "" if strip_fragment else parsed_url.fragment,
-        )
-    )
+    scheme = parsed_url.scheme
+    path = "/" if origin_only else parsed_url.path
+    query = "" if origin_only else parsed_url.query
+    fragment = "" if strip_fragment else parsed_url.fragment
+    if not (scheme and netloc):
+        return urlunsplit((scheme, netloc, path, query, fragment))
+
+    # Same as urlunsplit() for URLs with a scheme and a netloc, whose path is
+    # either empty or absolute.
+    stripped_url = f"{scheme}://{netloc}{path}"
+    if query:
+        stripped_url += f"?{query}"
+    if fragment:
+        stripped_url += f"#{fragment}"
+    return stripped_url
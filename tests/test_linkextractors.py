@@ -212,6 +212,12 @@ class Base:
             assert not lx.matches(url1)
             assert lx.matches(url2)
 
+            lx = self.extractor_cls(allow_domains=("evenmorestuff.com",))
+            lx.allow_domains.add("lotsofstuff.com")
+            assert lx.matches(url1)
+            lx.deny_domains.add("lotsofstuff.com")
+            assert not lx.matches(url1)
+
             lx = self.extractor_cls(
                 allow=["blah1"],
                 deny=["blah2"],
@@ -356,6 +362,18 @@ class Base:
                 Link(url="http://example.org/photo.jpg"),
             ]
 
+        def test_ignored_extensions_changed(self):
+            html = b"""<a href="page.html">asd</a> and <a href="photo.jpg">"""
+            response = HtmlResponse("http://example.org/", body=html)
+            lx = self.extractor_cls()
+            assert len(lx.extract_links(response)) == 1
+            lx.deny_extensions = set()
+            assert len(lx.extract_links(response)) == 2
+            lx.deny_extensions.add(".html")
+            assert lx.extract_links(response) == [
+                Link(url="http://example.org/photo.jpg"),
+            ]
+
         def test_process_value(self):
             """Test restrict_xpaths with encodings"""
             html = b"""